@@ -1,10 +1,22 @@
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, request, make_response, render_template
+from flask_compress import Compress
+import bisect
+import cachetools
+import datetime
+import diskcache
 import ee
+import functools
 import os
-import statistics
-
-# Initialize Earth Engine
-ee.Initialize(project="driven-airway-478206-j1")
+import threading
+import numpy as np
+import orjson
+
+# Initialize Earth Engine against the high-volume endpoint, which is
+# meant for servers issuing many concurrent requests
+ee.Initialize(
+    project="driven-airway-478206-j1",
+    opt_url="https://earthengine-highvolume.googleapis.com"
+)
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
@@ -12,156 +24,363 @@ app = Flask(
     __name__,
     template_folder=os.path.join(BASE_DIR, "templates")
 )
+# gzip/brotli responses; the grid payloads repeat the same keys many times
+Compress(app)
+
+# ---------------- JSON RESPONSES ----------------
+def json_response(payload):
+    """Serialize payload with orjson (faster than jsonify, handles NumPy)"""
+    return make_response(
+        orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY),
+        {"Content-Type": "application/json"}
+    )
+
+@app.errorhandler(ee.EEException)
+def earth_engine_error(error):
+    # Transient failures (quota, timeouts) are not "no data"; let the
+    # client retry instead of reporting an empty area
+    app.logger.warning("Earth Engine request failed: %s", error)
+    return json_response({"error": "Earth Engine request failed, please retry"}), 503
 
 # ---------------- HOME ----------------
 @app.route("/")
 def home():
     return render_template("index.html")
 
-# ---------------- CORE LST FUNCTION ----------------
-def get_lst(lat, lon, start_date, end_date):
-    point = ee.Geometry.Point([lon, lat])
+# ---------------- GRID ----------------
+# 7x7 grid around clicked point for better UHI detection
+GRID_STEP = 0.01
+GRID_EXTENT = 3 * GRID_STEP
+# (49, 2) array of (dlat, dlon) offsets, built once at import
+GRID_OFFSETS = np.stack(
+    np.meshgrid(np.arange(-3, 4) * GRID_STEP, np.arange(-3, 4) * GRID_STEP, indexing="ij"),
+    axis=-1
+).reshape(-1, 2)
+
+def grid_points(lat, lon):
+    """Build the 7x7 sampling grid as a single FeatureCollection"""
+    coords = (GRID_OFFSETS + (lat, lon)).tolist()
+    return ee.FeatureCollection([
+        ee.Feature(
+            ee.Geometry.Point([point_lon, point_lat]),
+            {"lat": point_lat, "lon": point_lon}
+        )
+        for point_lat, point_lon in coords
+    ])
+
+def grid_bounds(lat, lon):
+    """Bounding box covering the whole grid"""
+    return ee.Geometry.Rectangle([
+        lon - GRID_EXTENT, lat - GRID_EXTENT, lon + GRID_EXTENT, lat + GRID_EXTENT
+    ])
+
+def has_bands(image):
+    """False for the band-less composite of an empty collection"""
+    return image.bandNames().size().getInfo() > 0
+
+def reduce_points(image, band_expr, points, crs):
+    """Apply band_expr to the image and reduce every point in one call.
+
+    Returns a list of property dicts (lat, lon and one entry per band),
+    or an empty list if no scene was found. Any other Earth Engine error
+    (quota, timeouts) is raised.
+    """
+    bands = band_expr(image)
+    try:
+        result = bands.reduceRegions(
+            collection=points,
+            # Name outputs after bands so single- and multi-band images agree
+            reducer=ee.Reducer.mean().forEachBand(bands),
+            crs=crs,
+            scale=30
+        ).getInfo()
+    except ee.EEException:
+        # Only checked on failure, so the common path stays one round-trip
+        if has_bands(image):
+            raise
+        return []
+    return [f["properties"] for f in result["features"]]
+
+# ---------------- IMAGE SELECTION ----------------
+# Built once at import and reused by every query
+LC08 = ee.ImageCollection("LANDSAT/LC08/C02/T1_L2")
+# CLOUD_COVER is -1 when the cloud assessment failed; exclude those scenes
+LOW_CLOUD = ee.Filter.And(
+    ee.Filter.gte("CLOUD_COVER", 0),
+    ee.Filter.lt("CLOUD_COVER", 20)
+)
+# Number of scenes combined into the composite
+COMPOSITE_SIZE = 5
+# QA_PIXEL bits 1-4: dilated cloud, cirrus, cloud, cloud shadow
+CLOUD_QA_BITS = 0b11110
 
+def mask_clouds(image):
+    return image.updateMask(image.select("QA_PIXEL").bitwiseAnd(CLOUD_QA_BITS).eq(0))
+
+def pick_image(geometry, start_date, end_date):
+    """Median of the least cloudy Landsat 8 scenes covering geometry.
+
+    Cloud and shadow pixels are masked in each scene first, so the
+    composite fills them from the other scenes; the band scaling is
+    linear, so it commutes with the median.
+    """
     collection = (
-        ee.ImageCollection("LANDSAT/LC08/C02/T1_L2")
-        .filterBounds(point)
+        LC08
+        .filterBounds(geometry)
         .filterDate(start_date, end_date)
-        .filter(ee.Filter.lt("CLOUD_COVER", 20))
+        .filter(LOW_CLOUD)
         .sort("CLOUD_COVER")
     )
+    return collection.limit(COMPOSITE_SIZE).map(mask_clouds).median()
 
-    if collection.size().getInfo() == 0:
-        return None
+def utm_crs(lon):
+    """UTM zone Landsat delivers scenes in at this longitude.
 
-    image = ee.Image(collection.first())
+    A composite has no native projection, so reductions pass this to
+    sample on a 30 m grid like the source scenes rather than EPSG:4326.
+    """
+    zone = min(int((lon + 180) // 6) + 1, 60)
+    return f"EPSG:{32600 + zone}"
 
-    lst = (
+# ---------------- BAND MATH ----------------
+def lst_image(image):
+    return (
         image.select("ST_B10")
         .multiply(0.00341802)
         .add(149.0)
         .subtract(273.15)
+        .rename("lst")
     )
 
-    value = lst.reduceRegion(
+def ndvi_image(image):
+    # Calculate NDVI: (NIR - Red) / (NIR + Red)
+    # Landsat 8: NIR = B5, Red = B4
+    nir = image.select("SR_B5").multiply(0.0000275).add(-0.2)
+    red = image.select("SR_B4").multiply(0.0000275).add(-0.2)
+    return nir.subtract(red).divide(nir.add(red)).rename("ndvi")
+
+def lst_ndvi_image(image):
+    """Two-band (lst, ndvi) image so both are reduced in one call"""
+    return lst_image(image).addBands(ndvi_image(image))
+
+# ---------------- SERVER-SIDE VALUES ----------------
+def reduce_point(image, point, crs):
+    """Per-band means at point as an ee.Dictionary (not yet evaluated)"""
+    return image.reduceRegion(
         reducer=ee.Reducer.mean(),
         geometry=point,
+        crs=crs,
         scale=30
-    ).get("ST_B10")
+    )
 
-    return value.getInfo()
+def lst_at(lat, lon, start_date, end_date):
+    """{"lst": ...} at the point (not yet evaluated)"""
+    point = ee.Geometry.Point([lon, lat])
+    image = pick_image(point, start_date, end_date)
+    return reduce_point(lst_image(image), point, utm_crs(lon))
 
-# ---------------- NDVI FUNCTION ----------------
-def get_ndvi(lat, lon, start_date, end_date):
+def lst_ndvi_at(lat, lon, start_date, end_date):
+    """{"lst": ..., "ndvi": ...} from a single two-band reduction"""
     point = ee.Geometry.Point([lon, lat])
+    image = pick_image(point, start_date, end_date)
+    return reduce_point(lst_ndvi_image(image), point, utm_crs(lon))
+
+# ---------------- CACHING ----------------
+# Repeat queries for the same point and dates are served from memory.
+# Coordinates are quantized to 5 decimals (~1 m) to absorb float jitter.
+# Entries expire after a day, since a range ending today can gain scenes.
+# The cached functions raise on Earth Engine errors (including the
+# band-less composite of an empty collection) so failures are never
+# cached; the public get_* wrappers turn them into None.
+CACHE_SIZE = 4096
+CACHE_TTL = 24 * 60 * 60
+
+def memory_cached():
+    """Thread-safe in-process TTL cache (gunicorn workers are threaded)"""
+    return cachetools.cached(
+        cachetools.TTLCache(maxsize=CACHE_SIZE, ttl=CACHE_TTL),
+        lock=threading.Lock()
+    )
 
-    collection = (
-        ee.ImageCollection("LANDSAT/LC08/C02/T1_L2")
-        .filterBounds(point)
-        .filterDate(start_date, end_date)
-        .filter(ee.Filter.lt("CLOUD_COVER", 20))
-        .sort("CLOUD_COVER")
+# Results also persist on disk so restarts and other gunicorn workers can
+# reuse them. Only ranges that ended before INGESTION_LAG are persisted:
+# T1 scenes keep arriving for a few weeks after acquisition, so a range
+# ending recently (the frontend defaults to today) can still change.
+disk_cache = diskcache.Cache(
+    os.environ.get("UHI_CACHE_DIR", os.path.join(BASE_DIR, ".cache"))
+)
+DISK_CACHE_TTL = 30 * 24 * 60 * 60
+INGESTION_LAG = datetime.timedelta(days=30)
+# Part of every disk cache key. Bump whenever pick_image() or the band
+# math changes, so values computed the old way are no longer served.
+DISK_CACHE_VERSION = "v2"
+
+def is_settled(end_date):
+    """True if no new scenes can appear in a range ending at end_date"""
+    try:
+        end = datetime.date.fromisoformat(end_date)
+    except (TypeError, ValueError):
+        return False
+    return end <= datetime.date.today() - INGESTION_LAG
+
+def cached_on_disk(key, end_date, compute):
+    """Return compute(), persisted under key if end_date is settled"""
+    if not is_settled(end_date):
+        return compute()
+    key = f"{DISK_CACHE_VERSION}:{key}"
+    value = disk_cache.get(key)
+    if value is None:
+        value = compute()
+        # Errors raise before reaching here; empty results are not
+        # persisted since get() can't tell them from a miss
+        if value not in (None, (None, None), []):
+            disk_cache.set(key, value, expire=DISK_CACHE_TTL)
+    return value
+
+def disk_cached(kind):
+    """Persist func(lat, lon, start_date, end_date) results in disk_cache"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(lat, lon, start_date, end_date):
+            return cached_on_disk(
+                f"{kind}:{lat}:{lon}:{start_date}:{end_date}",
+                end_date,
+                lambda: func(lat, lon, start_date, end_date)
+            )
+        return wrapper
+    return decorator
+
+# ---------------- GRID VALUES ----------------
+def reduce_grid(band_expr, lat, lon, start_date, end_date):
+    """reduce_points() over the grid around (lat, lon), cached on disk"""
+    lat, lon = round(lat, 5), round(lon, 5)
+
+    def compute():
+        # One image for the whole grid; the 0.06° box sits well within a scene
+        image = pick_image(grid_bounds(lat, lon), start_date, end_date)
+        return reduce_points(image, band_expr, grid_points(lat, lon), utm_crs(lon))
+
+    return cached_on_disk(
+        f"grid_{band_expr.__name__}:{lat}:{lon}:{start_date}:{end_date}",
+        end_date,
+        compute
     )
 
-    if collection.size().getInfo() == 0:
+# ---------------- CORE LST FUNCTION ----------------
+@memory_cached()
+@disk_cached("lst")
+def _get_lst(lat, lon, start_date, end_date):
+    return lst_at(lat, lon, start_date, end_date).getInfo().get("lst")
+
+def get_lst(lat, lon, start_date, end_date):
+    try:
+        return _get_lst(round(lat, 5), round(lon, 5), start_date, end_date)
+    except ee.EEException:
         return None
 
-    image = ee.Image(collection.first())
+# ---------------- LST + NDVI FUNCTION ----------------
+@memory_cached()
+@disk_cached("lst_ndvi")
+def _get_lst_ndvi(lat, lon, start_date, end_date):
+    values = lst_ndvi_at(lat, lon, start_date, end_date).getInfo()
+    return values.get("lst"), values.get("ndvi")
 
-    # Calculate NDVI: (NIR - Red) / (NIR + Red)
-    # Landsat 8: NIR = B5, Red = B4
-    nir = image.select("SR_B5").multiply(0.0000275).add(-0.2)
-    red = image.select("SR_B4").multiply(0.0000275).add(-0.2)
-    ndvi = nir.subtract(red).divide(nir.add(red))
-
-    value = ndvi.reduceRegion(
-        reducer=ee.Reducer.mean(),
-        geometry=point,
-        scale=30
-    ).get("SR_B5")
-
-    return value.getInfo()
+def get_lst_ndvi(lat, lon, start_date, end_date):
+    """(lst, ndvi) for one point, fetched together"""
+    try:
+        return _get_lst_ndvi(round(lat, 5), round(lon, 5), start_date, end_date)
+    except ee.EEException:
+        return None, None
 
 # ---------------- HEAT STRESS CATEGORIZATION ----------------
+# Upper bounds (exclusive) of each level, and the shared category dicts.
+# Callers must treat the returned dicts as read-only.
+HEAT_STRESS_THRESHOLDS = (30.0, 38.0, 45.0)
+HEAT_STRESS_CATEGORIES = (
+    {"level": "Low", "color": "#22c55e", "risk": "Minimal heat-related health risks"},
+    {"level": "Moderate", "color": "#eab308", "risk": "Caution advised for prolonged outdoor activities"},
+    {"level": "High", "color": "#f97316", "risk": "Heat exhaustion possible with extended exposure"},
+    {"level": "Extreme", "color": "#ef4444", "risk": "Heat stroke risk - limit outdoor activities"},
+)
+
 def categorize_heat_stress(temp):
     """Categorize temperature into heat stress levels"""
     if temp is None:
         return None
-    if temp < 30:
-        return {"level": "Low", "color": "#22c55e", "risk": "Minimal heat-related health risks"}
-    elif temp < 38:
-        return {"level": "Moderate", "color": "#eab308", "risk": "Caution advised for prolonged outdoor activities"}
-    elif temp < 45:
-        return {"level": "High", "color": "#f97316", "risk": "Heat exhaustion possible with extended exposure"}
-    else:
-        return {"level": "Extreme", "color": "#ef4444", "risk": "Heat stroke risk - limit outdoor activities"}
+    return HEAT_STRESS_CATEGORIES[bisect.bisect_right(HEAT_STRESS_THRESHOLDS, temp)]
 
 # ---------------- RECOMMENDATIONS GENERATOR ----------------
+# Lower bounds (inclusive) of each priority after "Low", and the constant
+# recommendations for each. Callers must treat the dicts as read-only.
+PRIORITY_THRESHOLDS = (30, 35, 40)
+PRIORITY_RECOMMENDATIONS = (
+    ("Low", (
+        {"icon": "✅", "title": "Maintain Current Conditions", "desc": "Temperature levels are within comfortable range. Focus on preservation."},
+    )),
+    ("Moderate", (
+        {"icon": "🌿", "title": "Vegetation Enhancement", "desc": "Increase vegetation cover through parks and street plantings."},
+        {"icon": "🏢", "title": "Building Guidelines", "desc": "Recommend reflective building materials for new constructions."},
+    )),
+    ("High", (
+        {"icon": "🌳", "title": "Urban Forestry Priority", "desc": "Recommended zone for tree planting initiatives and urban greening projects."},
+        {"icon": "🏗️", "title": "Cool Materials", "desc": "Encourage use of high-albedo roofing and wall materials in construction."},
+        {"icon": "🏠", "title": "Green Infrastructure", "desc": "Promote green roofs, vertical gardens, and permeable surfaces."},
+    )),
+    ("Critical", (
+        {"icon": "🌳", "title": "Urgent Urban Forestry", "desc": "High priority for immediate tree planting programs to provide shade and evaporative cooling."},
+        {"icon": "🏗️", "title": "Cool Pavement Implementation", "desc": "Replace dark asphalt with reflective or permeable cool pavements to reduce heat absorption."},
+        {"icon": "🏠", "title": "Green Roof Mandate", "desc": "Implement green roof requirements for new and existing buildings in this zone."},
+        {"icon": "💧", "title": "Water Features", "desc": "Install fountains, misting systems, or urban water bodies for localized cooling."},
+    )),
+)
+
+# NDVI templates; "desc" is formatted with the NDVI value
+NDVI_CRITICAL_RECOMMENDATION = {"icon": "🚨", "title": "Critical Vegetation Deficit", "desc": "NDVI: {ndvi:.2f} - Severely limited vegetation. Urgent need for green space development."}
+NDVI_LOW_RECOMMENDATION = {"icon": "⚠️", "title": "Low Vegetation Cover", "desc": "NDVI: {ndvi:.2f} - Below optimal vegetation levels. Recommend increased planting."}
+
 def generate_recommendations(temp, ndvi):
     """Generate urban planning recommendations based on temperature and NDVI"""
-    recommendations = []
-    priority = "Low"
-    
     if temp is None:
-        return {"priority": priority, "recommendations": []}
+        return {"priority": "Low", "recommendations": []}
     
     # Temperature-based recommendations
-    if temp >= 40:
-        priority = "Critical"
-        recommendations.extend([
-            {"icon": "🌳", "title": "Urgent Urban Forestry", "desc": "High priority for immediate tree planting programs to provide shade and evaporative cooling."},
-            {"icon": "🏗️", "title": "Cool Pavement Implementation", "desc": "Replace dark asphalt with reflective or permeable cool pavements to reduce heat absorption."},
-            {"icon": "🏠", "title": "Green Roof Mandate", "desc": "Implement green roof requirements for new and existing buildings in this zone."},
-            {"icon": "💧", "title": "Water Features", "desc": "Install fountains, misting systems, or urban water bodies for localized cooling."},
-        ])
-    elif temp >= 35:
-        priority = "High"
-        recommendations.extend([
-            {"icon": "🌳", "title": "Urban Forestry Priority", "desc": "Recommended zone for tree planting initiatives and urban greening projects."},
-            {"icon": "🏗️", "title": "Cool Materials", "desc": "Encourage use of high-albedo roofing and wall materials in construction."},
-            {"icon": "🏠", "title": "Green Infrastructure", "desc": "Promote green roofs, vertical gardens, and permeable surfaces."},
-        ])
-    elif temp >= 30:
-        priority = "Moderate"
-        recommendations.extend([
-            {"icon": "🌿", "title": "Vegetation Enhancement", "desc": "Increase vegetation cover through parks and street plantings."},
-            {"icon": "🏢", "title": "Building Guidelines", "desc": "Recommend reflective building materials for new constructions."},
-        ])
-    else:
-        priority = "Low"
-        recommendations.append(
-            {"icon": "✅", "title": "Maintain Current Conditions", "desc": "Temperature levels are within comfortable range. Focus on preservation."}
-        )
+    priority, base = PRIORITY_RECOMMENDATIONS[bisect.bisect_right(PRIORITY_THRESHOLDS, temp)]
+    recommendations = list(base)
     
     # NDVI-based recommendations (if available)
     if ndvi is not None:
         if ndvi < 0.2:
-            recommendations.append(
-                {"icon": "🚨", "title": "Critical Vegetation Deficit", "desc": f"NDVI: {ndvi:.2f} - Severely limited vegetation. Urgent need for green space development."}
-            )
+            template = NDVI_CRITICAL_RECOMMENDATION
         elif ndvi < 0.4:
-            recommendations.append(
-                {"icon": "⚠️", "title": "Low Vegetation Cover", "desc": f"NDVI: {ndvi:.2f} - Below optimal vegetation levels. Recommend increased planting."}
-            )
+            template = NDVI_LOW_RECOMMENDATION
+        else:
+            template = None
+        if template is not None:
+            recommendations.append(dict(template, desc=template["desc"].format(ndvi=ndvi)))
     
     return {"priority": priority, "recommendations": recommendations}
 
 # ---------------- POINT LST ----------------
+# Values /lst can return; LST is always included
+LST_FIELDS = ("lst", "ndvi")
+
 @app.route("/lst", methods=["POST"])
 def lst_api():
     data = request.json
-
-    lst = get_lst(
-        data["lat"],
-        data["lon"],
-        data["start"],
-        data["end"]
-    )
+    args = (data["lat"], data["lon"], data["start"], data["end"])
+
+    # Callers may ask for LST only, which skips the NDVI band entirely
+    fields = data.get("fields", list(LST_FIELDS))
+    if not isinstance(fields, list) or not all(f in LST_FIELDS for f in fields):
+        return json_response({"error": f"fields must be a list of {list(LST_FIELDS)}"}), 400
+    if "ndvi" in fields:
+        # LST and NDVI for the same point in a single round-trip
+        lst, ndvi = get_lst_ndvi(*args)
+    else:
+        lst, ndvi = get_lst(*args), None
 
     if lst is None:
-        return jsonify({"error": "No valid data"}), 404
-
-    # Get NDVI for the same point
-    ndvi = get_ndvi(data["lat"], data["lon"], data["start"], data["end"])
+        return json_response({"error": "No valid data"}), 404
     
     # Get heat stress category
     heat_stress = categorize_heat_stress(lst)
@@ -169,7 +388,7 @@ def lst_api():
     # Generate recommendations
     recommendations = generate_recommendations(lst, ndvi)
 
-    return jsonify({
+    return json_response({
         "lst_celsius": round(lst, 2),
         "ndvi": round(ndvi, 3) if ndvi else None,
         "heat_stress": heat_stress,
@@ -187,69 +406,66 @@ def heatmap_api():
     end = data["end"]
 
     points = []
+    lats = []
+    lons = []
     temps = []
-    raw_data = []
 
-    # 7x7 grid around clicked point for better UHI detection
-    offsets = [-0.03, -0.02, -0.01, 0, 0.01, 0.02, 0.03]
-    
-    for dx in offsets:
-        for dy in offsets:
-            try:
-                point_lat = lat + dx
-                point_lon = lon + dy
-                lst = get_lst(point_lat, point_lon, start, end)
-                if lst is not None:
-                    temps.append(lst)
-                    raw_data.append({"lat": point_lat, "lon": point_lon, "temp": lst})
-                    # normalize intensity to 0–1 (20°C = cool, 50°C = hot)
-                    intensity = min(max((lst - 20) / 30, 0), 1)
-                    points.append([point_lat, point_lon, intensity])
-            except Exception:
-                continue
+    for props in reduce_grid(lst_image, lat, lon, start, end):
+        lst = props.get("lst")
+        if lst is not None:
+            point_lat = props["lat"]
+            point_lon = props["lon"]
+            lats.append(point_lat)
+            lons.append(point_lon)
+            temps.append(lst)
+            # normalize intensity to 0–1 (20°C = cool, 50°C = hot)
+            intensity = min(max((lst - 20) / 30, 0), 1)
+            points.append([point_lat, point_lon, intensity])
 
     if not points:
-        return jsonify({"error": "No valid data found for this area"}), 404
+        return json_response({"error": "No valid data found for this area"}), 404
 
     # Calculate statistics for UHI detection
-    avg_temp = sum(temps) / len(temps)
-    std_dev = statistics.stdev(temps) if len(temps) > 1 else 0
+    temp_arr = np.asarray(temps, dtype=np.float64)
+    min_temp = float(temp_arr.min())
+    max_temp = float(temp_arr.max())
+    avg_temp = float(temp_arr.mean())
+    std_dev = float(temp_arr.std(ddof=1)) if len(temps) > 1 else 0.0
     
     # UHI Detection: Points significantly warmer than surroundings (> 1.5 std dev above mean)
     uhi_threshold = avg_temp + (1.5 * std_dev) if std_dev > 0 else avg_temp + 2
-    uhi_hotspots = []
     
-    for point_data in raw_data:
-        if point_data["temp"] >= uhi_threshold:
-            heat_stress = categorize_heat_stress(point_data["temp"])
-            uhi_hotspots.append({
-                "lat": point_data["lat"],
-                "lon": point_data["lon"],
-                "temp": round(point_data["temp"], 2),
-                "deviation": round(point_data["temp"] - avg_temp, 2),
-                "heat_stress": heat_stress
-            })
-    
-    # Sort hotspots by temperature (hottest first)
-    uhi_hotspots.sort(key=lambda x: x["temp"], reverse=True)
+    # Only the (few) hotspots are materialized as dicts, hottest first
+    hot = np.flatnonzero(temp_arr >= uhi_threshold)
+    hot = hot[np.argsort(-temp_arr[hot], kind="stable")]
+    uhi_hotspots = []
+    for i in hot:
+        temp = temps[i]
+        uhi_hotspots.append({
+            "lat": lats[i],
+            "lon": lons[i],
+            "temp": round(temp, 2),
+            "deviation": round(temp - avg_temp, 2),
+            "heat_stress": categorize_heat_stress(temp)
+        })
     
     # Generate area-wide recommendations based on max temp
-    max_temp = max(temps)
     recommendations = generate_recommendations(max_temp, None)
     
-    # Categorize all points by heat stress
-    heat_stress_summary = {"Low": 0, "Moderate": 0, "High": 0, "Extreme": 0}
-    for t in temps:
-        cat = categorize_heat_stress(t)
-        if cat:
-            heat_stress_summary[cat["level"]] += 1
-
-    return jsonify({
+    # Categorize all points by heat stress (same bins as categorize_heat_stress)
+    levels = np.searchsorted(HEAT_STRESS_THRESHOLDS, temp_arr, side="right")
+    counts = np.bincount(levels, minlength=len(HEAT_STRESS_CATEGORIES))
+    heat_stress_summary = {
+        cat["level"]: int(count)
+        for cat, count in zip(HEAT_STRESS_CATEGORIES, counts)
+    }
+
+    return json_response({
         "points": points,
         "stats": {
             "count": len(points),
-            "min_temp": round(min(temps), 2),
-            "max_temp": round(max(temps), 2),
+            "min_temp": round(min_temp, 2),
+            "max_temp": round(max_temp, 2),
             "avg_temp": round(avg_temp, 2),
             "std_dev": round(std_dev, 2),
             "uhi_threshold": round(uhi_threshold, 2)
@@ -273,33 +489,28 @@ def ndvi_api():
     ndvi_values = []
 
     # 7x7 grid matching heatmap
-    offsets = [-0.03, -0.02, -0.01, 0, 0.01, 0.02, 0.03]
-    
-    for dx in offsets:
-        for dy in offsets:
-            try:
-                point_lat = lat + dx
-                point_lon = lon + dy
-                ndvi = get_ndvi(point_lat, point_lon, start, end)
-                if ndvi is not None:
-                    ndvi_values.append(ndvi)
-                    # NDVI ranges from -1 to 1, normalize to 0-1 for display
-                    # Higher NDVI (more vegetation) = green, Lower = brown/red
-                    intensity = max(0, min(1, (ndvi + 0.2) / 0.8))
-                    points.append({
-                        "lat": point_lat,
-                        "lon": point_lon,
-                        "ndvi": round(ndvi, 3),
-                        "intensity": intensity
-                    })
-            except Exception:
-                continue
+    for props in reduce_grid(ndvi_image, lat, lon, start, end):
+        ndvi = props.get("ndvi")
+        if ndvi is not None:
+            ndvi_values.append(ndvi)
+            # NDVI ranges from -1 to 1, normalize to 0-1 for display
+            # Higher NDVI (more vegetation) = green, Lower = brown/red
+            intensity = max(0, min(1, (ndvi + 0.2) / 0.8))
+            points.append({
+                "lat": props["lat"],
+                "lon": props["lon"],
+                "ndvi": round(ndvi, 3),
+                "intensity": intensity
+            })
 
     if not points:
-        return jsonify({"error": "No valid NDVI data found"}), 404
+        return json_response({"error": "No valid NDVI data found"}), 404
 
     # Categorize vegetation coverage
-    avg_ndvi = sum(ndvi_values) / len(ndvi_values)
+    ndvi_arr = np.asarray(ndvi_values, dtype=np.float64)
+    min_ndvi = float(ndvi_arr.min())
+    max_ndvi = float(ndvi_arr.max())
+    avg_ndvi = float(ndvi_arr.mean())
     
     if avg_ndvi < 0.1:
         veg_status = {"level": "Barren/Built-up", "color": "#ef4444", "desc": "Minimal vegetation - likely urban/built-up area"}
@@ -312,12 +523,12 @@ def ndvi_api():
     else:
         veg_status = {"level": "Dense", "color": "#22c55e", "desc": "Dense vegetation - forest/agricultural"}
 
-    return jsonify({
+    return json_response({
         "points": points,
         "stats": {
             "count": len(points),
-            "min_ndvi": round(min(ndvi_values), 3),
-            "max_ndvi": round(max(ndvi_values), 3),
+            "min_ndvi": round(min_ndvi, 3),
+            "max_ndvi": round(max_ndvi, 3),
             "avg_ndvi": round(avg_ndvi, 3)
         },
         "vegetation_status": veg_status
@@ -335,43 +546,37 @@ def correlation_api():
     end = data["end"]
 
     paired_data = []
-    offsets = [-0.03, -0.02, -0.01, 0, 0.01, 0.02, 0.03]
-    
-    for dx in offsets:
-        for dy in offsets:
-            try:
-                point_lat = lat + dx
-                point_lon = lon + dy
-                lst = get_lst(point_lat, point_lon, start, end)
-                ndvi = get_ndvi(point_lat, point_lon, start, end)
-                if lst is not None and ndvi is not None:
-                    heat_stress = categorize_heat_stress(lst)
-                    paired_data.append({
-                        "lat": point_lat,
-                        "lon": point_lon,
-                        "lst": round(lst, 2),
-                        "ndvi": round(ndvi, 3),
-                        "heat_stress": heat_stress["level"]
-                    })
-            except Exception:
-                continue
+
+    # LST and NDVI come from the same image, so reduce both bands together
+    for props in reduce_grid(lst_ndvi_image, lat, lon, start, end):
+        lst = props.get("lst")
+        ndvi = props.get("ndvi")
+        if lst is not None and ndvi is not None:
+            heat_stress = categorize_heat_stress(lst)
+            paired_data.append({
+                "lat": props["lat"],
+                "lon": props["lon"],
+                "lst": round(lst, 2),
+                "ndvi": round(ndvi, 3),
+                "heat_stress": heat_stress["level"]
+            })
 
     if len(paired_data) < 3:
-        return jsonify({"error": "Insufficient data for correlation analysis"}), 404
+        return json_response({"error": "Insufficient data for correlation analysis"}), 404
 
     # Calculate Pearson correlation coefficient
-    lst_values = [d["lst"] for d in paired_data]
-    ndvi_values = [d["ndvi"] for d in paired_data]
-    
     n = len(paired_data)
-    mean_lst = sum(lst_values) / n
-    mean_ndvi = sum(ndvi_values) / n
-    
-    numerator = sum((lst_values[i] - mean_lst) * (ndvi_values[i] - mean_ndvi) for i in range(n))
-    denom_lst = sum((x - mean_lst) ** 2 for x in lst_values) ** 0.5
-    denom_ndvi = sum((x - mean_ndvi) ** 2 for x in ndvi_values) ** 0.5
-    
-    correlation = numerator / (denom_lst * denom_ndvi) if denom_lst * denom_ndvi != 0 else 0
+    lst_values = np.fromiter((d["lst"] for d in paired_data), dtype=np.float64, count=n)
+    ndvi_values = np.fromiter((d["ndvi"] for d in paired_data), dtype=np.float64, count=n)
+
+    mean_lst = float(lst_values.mean())
+    mean_ndvi = float(ndvi_values.mean())
+
+    # A constant series has no defined correlation; report 0 as before
+    with np.errstate(invalid="ignore", divide="ignore"):
+        correlation = float(np.corrcoef(lst_values, ndvi_values)[0, 1])
+    if not np.isfinite(correlation):
+        correlation = 0
     
     # Interpret correlation
     if correlation < -0.7:
@@ -385,7 +590,7 @@ def correlation_api():
     else:
         interpretation = "Unexpected positive correlation - may indicate data quality issues or unique local conditions"
 
-    return jsonify({
+    return json_response({
         "data": paired_data,
         "correlation": round(correlation, 3),
         "interpretation": interpretation,
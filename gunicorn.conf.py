@@ -0,0 +1,14 @@
+# Gunicorn settings for serving app:app
+#   gunicorn app:app
+# Requests spend most of their time waiting on Earth Engine, so each
+# worker runs a pool of threads. Total concurrency (workers x threads) is
+# bounded by the Earth Engine request quota, not by CPU count, so the
+# worker count is fixed; override it with WEB_CONCURRENCY.
+import os
+
+bind = "127.0.0.1:5000"
+workers = int(os.environ.get("WEB_CONCURRENCY", 4))
+worker_class = "gthread"
+threads = 16
+# Earth Engine reductions over a full grid can take a while
+timeout = 120
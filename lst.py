@@ -1,14 +1,20 @@
 import ee
 
-# Initialize Earth Engine
-ee.Initialize(project="driven-airway-478206-j1")
+# Initialize Earth Engine against the high-volume endpoint, which is
+# meant for servers issuing many concurrent requests
+ee.Initialize(
+    project="driven-airway-478206-j1",
+    opt_url="https://earthengine-highvolume.googleapis.com"
+)
+
+LC08 = ee.ImageCollection("LANDSAT/LC08/C02/T1_L2")
 
 
 def get_lst(lat, lon, start_date, end_date):
     point = ee.Geometry.Point([lon, lat])
 
     collection = (
-        ee.ImageCollection("LANDSAT/LC08/C02/T1_L2")
+        LC08
         .filterBounds(point)
         .filterDate(start_date, end_date)
         .sort("CLOUD_COVER")